@@ -0,0 +1,205 @@
+"""
+_merge_core.py — горячий обход деревьев переводов для i18n_merger.py.
+
+Модуль — обычный Python с полными аннотациями типов, поэтому его можно
+(необязательно) скомпилировать mypyc в C-расширение прямо на месте:
+
+    mypyc _merge_core.py
+
+Скомпилированный `.so` импортируется вместо `.py` автоматически; без него
+используется этот же исходник.
+"""
+from __future__ import annotations
+
+from collections import deque
+from pathlib import Path
+from typing import Any, Iterable, Mapping, MutableMapping
+
+
+# --------------------------------------------------------------------------- #
+class InvalidTranslationFile(ValueError):
+    """Raised when a localisation file has an unexpected structure."""
+
+
+# ---------- validation ----------------------------------------------------- #
+def validate_tree(node: Any, filename: Path) -> None:
+    """
+    Проверяем дерево переводов обходом через явный стек (без рекурсии).
+
+    Допустимые листья:
+    • str
+    • list[...]   — элементы проверяются тем же обходом
+    • dict        — элементы проверяются тем же обходом
+
+    Сами мергеры эту функцию больше не вызывают — те же проверки
+    выполняет `merge_nested`; оставлена для внешнего кода.
+    """
+    # id контейнеров на текущем пути от корня: YAML-якоря могут ссылаться
+    # сами на себя, и без этой проверки обход никогда бы не закончился
+    on_path: set[int] = set()
+    stack: deque[tuple[Any, bool]] = deque([(node, False)])
+    while stack:
+        current, leaving = stack.pop()
+        if leaving:                              # поддерево пройдено целиком
+            on_path.discard(id(current))
+            continue
+
+        t = type(current)                        # точный тип — быстрый путь до ABC Mapping
+        if t is str:                             # самый частый случай — лист
+            continue
+
+        children: Iterable[Any]
+        if t is dict or isinstance(current, Mapping):    # словарь
+            children = current.values()
+
+        elif isinstance(current, list):                  # массив
+            children = current
+
+        # точный str отсеян выше — здесь проходят только подклассы str
+        elif not isinstance(current, str):       # всё остальное запрещено
+            raise InvalidTranslationFile(
+                f"{filename}: leaf values must be strings, got {type(current).__name__}"
+            )
+        else:
+            continue
+
+        if id(current) in on_path:
+            raise InvalidTranslationFile(f"{filename}: cyclic reference")
+        on_path.add(id(current))
+        stack.append((current, True))
+        stack.extend((child, False) for child in children)
+
+
+# ---------- deep-merge routine --------------------------------------------- #
+def merge_nested(
+    base: MutableMapping[Any, Any],
+    incoming: Mapping[Any, Any],
+    lang: str,
+    filename: Path,
+) -> None:
+    """
+    Сливаем `incoming` в `base` обходом через явный стек (без рекурсии).
+
+    * dict  → пара (узел base, узел incoming) кладётся в стек;
+    * list  → элементы объединяем по индексам:
+        ─ элемент-строка        → {"ru": "...", "en": "..."}
+        ─ элемент-словарь       → кладём в стек так же, как dict;
+    * str   → прежнее поведение;
+    * прочие типы листьев → InvalidTranslationFile (проверка идёт прямо
+      в обходе слияния, отдельный проход `validate_tree` не нужен).
+    """
+    if not isinstance(incoming, Mapping):
+        raise InvalidTranslationFile(
+            f"{filename}: top-level value must be a mapping, got {type(incoming).__name__}"
+        )
+
+    # id словарей `incoming` на текущем пути от корня: YAML-якоря могут
+    # ссылаться сами на себя, и без этой проверки слияние не закончилось бы.
+    # Пара (None, src) в стеке — отметка «поддерево src пройдено».
+    on_path: set[int] = set()
+    stack: deque[tuple[MutableMapping[Any, Any] | None, Mapping[Any, Any]]] = deque(
+        [(base, incoming)]
+    )
+    while stack:
+        dst, src = stack.pop()
+        if dst is None:
+            on_path.discard(id(src))
+            continue
+        on_path.add(id(src))
+        stack.append((None, src))
+
+        dst_get = dst.get
+        for key, value in src.items():
+            # точный тип дешевле isinstance(…, Mapping): парсеры отдают
+            # ровно dict / list / str, подклассы встречаются редко
+            t = type(value)
+            if t is not str and t is not dict and t is not list:
+                t = node_kind(value)
+
+            # ---------- строка ----------------------------------------
+            if t is str:
+                leaf: Any = dst_get(key)
+                if leaf is None:
+                    leaf = dst[key] = {}
+                elif type(leaf) is not dict and not isinstance(leaf, Mapping):
+                    raise InvalidTranslationFile(
+                        f"Structure mismatch at key '{key}' between languages (file {filename})"
+                    )
+                leaf[lang] = value
+
+            # ---------- вложенный словарь ------------------------------
+            elif t is dict:
+                node: Any = dst_get(key)
+                if node is None:
+                    node = dst[key] = {}
+                elif type(node) is not dict and not isinstance(node, Mapping):
+                    raise InvalidTranslationFile(
+                        f"Structure mismatch at key '{key}' between languages (file {filename})"
+                    )
+                if id(value) in on_path:
+                    raise InvalidTranslationFile(f"{filename}: cyclic reference at key '{key}'")
+                stack.append((node, value))
+
+            # ---------- массив ----------------------------------------
+            elif t is list:
+                dst_list: Any = dst_get(key)
+                if dst_list is None:
+                    dst_list = dst[key] = []
+                elif not isinstance(dst_list, list):
+                    raise InvalidTranslationFile(
+                        f"Structure mismatch at key '{key}' between languages (file {filename})"
+                    )
+
+                # расширяем список, если этот язык принёс больше элементов;
+                # пустая «ячейка» — отдельный словарь (для строк и словарей)
+                missing = len(value) - len(dst_list)
+                if missing > 0:
+                    dst_list.extend([{} for _ in range(missing)])
+
+                for i, item in enumerate(value):
+                    # гарантируем, что dst_list[i] — dict (контейнер для слияния)
+                    cell: Any = dst_list[i]
+                    if type(cell) is not dict and not isinstance(cell, Mapping):
+                        cell = dst_list[i] = {}
+
+                    t_item = type(item)
+                    if t_item is not str and t_item is not dict:
+                        t_item = node_kind(item)
+
+                    if t_item is str:                        # строка внутри массива
+                        cell[lang] = item
+
+                    elif t_item is dict:                     # объект внутри массива
+                        if id(item) in on_path:
+                            raise InvalidTranslationFile(
+                                f"{filename}: cyclic reference at key '{key}[{i}]'"
+                            )
+                        stack.append((cell, item))
+
+                    elif t_item is list:                     # массив внутри массива
+                        raise InvalidTranslationFile(
+                            f"{filename}: unsupported array element "
+                            f"type {type(item).__name__} at key '{key}[{i}]'"
+                        )
+
+                    else:                                    # недопустимый лист
+                        raise InvalidTranslationFile(
+                            f"{filename}: leaf values must be strings, got {type(item).__name__}"
+                        )
+
+            # ---------- всё остальное запрещено -----------------------
+            else:
+                raise InvalidTranslationFile(
+                    f"{filename}: leaf values must be strings, got {type(value).__name__}"
+                )
+
+
+def node_kind(value: Any) -> type:
+    """Сводим подклассы str / list и прочие Mapping к dict / list / str."""
+    if isinstance(value, Mapping):
+        return dict
+    if isinstance(value, list):
+        return list
+    if isinstance(value, str):
+        return str
+    return type(value)
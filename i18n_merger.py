@@ -12,148 +12,217 @@ python i18n_merger.py merge-js   --input-dir ./src/js   --output ./dst/frontend.
 from __future__ import annotations
 
 import argparse
+import contextlib
+import hashlib
 import json
+import os
+import pickle
 import re
 import sys
+import tempfile
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Mapping, MutableMapping
+from typing import Any, Callable, Dict, List, Mapping, Tuple
 
 import json5
+import orjson
+import platformdirs
 import quickjs
 import yaml
 
-
-# --------------------------------------------------------------------------- #
-class InvalidTranslationFile(ValueError):
-    """Raised when a localisation file has an unexpected structure."""
+from _merge_core import InvalidTranslationFile, validate_tree
+from _merge_core import merge_nested as _merge_nested
+
+# C-загрузчик на libyaml заметно быстрее; если PyYAML собран без него —
+# используем чистый Python-вариант с той же (safe) семантикой
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader  # type: ignore[assignment]
+
+# потоков для параллельного чтения файлов из input-dir
+_READ_WORKERS = 8
+
+# пул процессов для парсинга запускаем, только если изменившихся файлов
+# не меньше _PARSE_POOL_MIN_FILES и в сумме они не меньше _PARSE_POOL_MIN_BYTES:
+# на паре небольших файлов запуск воркеров дороже самого парсинга
+_PARSE_POOL_MIN_FILES = 4
+_PARSE_POOL_MIN_BYTES = 256 * 1024
+
+# версия формата кэша разобранных файлов; повышать при изменении парсинга
+_CACHE_VERSION = 4
+
+# JS, выполняемый один раз при создании общего контекста QuickJS
+_QJS_FREEZE_INTRINSICS = """
+Object.freeze(Object.prototype);
+Object.freeze(Array.prototype);
+Object.freeze(JSON);
+Object.defineProperty(globalThis, "JSON", {writable: false, configurable: false});
+"""
 
 
+# --------------------------------------------------------------------------- #
 class BaseMerger(ABC):
     """Base class for any file-type merger."""
 
-    def __init__(self, input_dir: Path) -> None:
+    # парсить ли файлы в пуле процессов (имеет смысл, когда парсинг
+    # дороже передачи результата между процессами)
+    _parallel_parse: bool = False
+
+    def __init__(self, input_dir: Path, use_cache: bool = True) -> None:
         if not input_dir.is_dir():
             raise FileNotFoundError(f"{input_dir} is not a directory")
         self.input_dir = input_dir.resolve()
+        self._cache_dir = Path(platformdirs.user_cache_dir("i18n_merger")) if use_cache else None
 
     @abstractmethod
     def merge(self) -> Dict[str, Any]:  # noqa: D401
         """Return merged translations with nested structure preserved."""
 
     # ---------- helpers ---------------------------------------------------- #
-    @staticmethod
-    def _validate_tree(node: Any, filename: Path) -> None:
+    def _read_files(self, files: List[Path]) -> List[Tuple[Path, bytes]]:
         """
-        Рекурсивно проверяем дерево переводов.
+        Читаем файлы параллельно в пуле потоков.
 
-        Допустимые листья:
-        • str
-        • list[...]   — элементы рекурсивно валидируются
-        • dict        — элементы рекурсивно валидируются
+        `read()` отпускает GIL, поэтому системные вызовы open/read/close
+        для множества мелких файлов перекрываются, а не идут друг за другом.
         """
-        if isinstance(node, Mapping):            # словарь
-            for v in node.values():
-                BaseMerger._validate_tree(v, filename)
-
-        elif isinstance(node, list):             # массив
-            for item in node:
-                BaseMerger._validate_tree(item, filename)
-
-        elif not isinstance(node, str):          # всё остальное запрещено
-            raise InvalidTranslationFile(
-                f"{filename}: leaf values must be strings, got {type(node).__name__}"
-            )
-
-
-# ---------- deep-merge routine --------------------------------------------- #
-def _merge_nested(
-    base: MutableMapping[str, Any],
-    incoming: Mapping[str, Any],
-    lang: str,
-    filename: Path,
-) -> None:
-    """
-    Рекурсивно сливаем `incoming` в `base`.
+        if len(files) < 2:
+            return [(file, file.read_bytes()) for file in files]
+        with ThreadPoolExecutor(max_workers=min(_READ_WORKERS, len(files))) as pool:
+            return list(zip(files, pool.map(Path.read_bytes, files)))
+
+    def _parse_files(
+        self,
+        pattern: str,
+        parse: Callable[[Path, bytes], Any],
+    ) -> List[Tuple[Path, Any]]:
+        """
+        Возвращаем (файл, payload) для всех файлов по маске.
 
-    * dict  → углубляемся рекурсией;
-    * list  → элементы объединяем по индексам:
-        ─ элемент-строка        → {"ru": "...", "en": "..."}
-        ─ элемент-словарь       → объединяем так же рекурсивно;
-    * str   → прежнее поведение.
-    """
-    for key, value in incoming.items():
-
-        # ---------- вложенный словарь ----------------------------------
-        if isinstance(value, Mapping):
-            base.setdefault(key, {})
-            if not isinstance(base[key], Mapping):
-                raise InvalidTranslationFile(
-                    f"Structure mismatch at key '{key}' between languages (file {filename})"
-                )
-            _merge_nested(base[key], value, lang, filename)
-
-        # ---------- массив --------------------------------------------
-        elif isinstance(value, list):
-            base.setdefault(key, [])
-            dst_list: list[Any] = base[key]  # type: ignore[arg-type]
-
-            if not isinstance(dst_list, list):
-                raise InvalidTranslationFile(
-                    f"Structure mismatch at key '{key}' between languages (file {filename})"
-                )
-
-            # расширяем список, если этот язык принёс больше элементов
-            while len(dst_list) < len(value):
-                # пустая «ячейка» — словарь (для строк и словарей)
-                dst_list.append({})
-
-            for i, item in enumerate(value):
-                # гарантируем, что dst_list[i] — dict (контейнер для слияния)
-                if not isinstance(dst_list[i], Mapping):
-                    dst_list[i] = {}
-
-                if isinstance(item, Mapping):            # объект внутри массива
-                    _merge_nested(dst_list[i], item, lang, filename)
-
-                elif isinstance(item, str):              # строка внутри массива
-                    dst_list[i][lang] = item
-
-                else:                                    # недопустимый тип
-                    raise InvalidTranslationFile(
-                        f"{filename}: unsupported array element "
-                        f"type {type(item).__name__} at key '{key}[{i}]'"
-                    )
-
-        # ---------- строка --------------------------------------------
-        else:
-            leaf = base.setdefault(key, {})
-            if not isinstance(leaf, Mapping):
-                raise InvalidTranslationFile(
-                    f"Structure mismatch at key '{key}' between languages (file {filename})"
-                )
-            leaf[lang] = value
+        Неизменившиеся файлы (тот же mtime и размер) берутся из кэша
+        в `platformdirs.user_cache_dir("i18n_merger")`, остальные читаются,
+        разбираются `parse` и кэшируются (если кэш не отключён).
+        """
+        files = list(self.input_dir.glob(pattern))
+        payloads: Dict[Path, Any] = {}
+        stale: List[Tuple[Path, Any]] = []
+        for file in files:
+            if self._cache_dir is None:
+                stale.append((file, None))
+                continue
+            key = self._cache_key(file)
+            hit, payload = self._cache_load(file, key)
+            if hit:
+                payloads[file] = payload
+            else:
+                stale.append((file, key))
+
+        keys = dict(stale)
+        for file, payload in self._parse_all(self._read_files(list(keys)), parse):
+            payloads[file] = payload
+            self._cache_store(file, keys[file], payload)
+        return [(file, payloads[file]) for file in files]
+
+    def _parse_all(
+        self,
+        items: List[Tuple[Path, bytes]],
+        parse: Callable[[Path, bytes], Any],
+    ) -> List[Tuple[Path, Any]]:
+        """
+        Разбираем прочитанные файлы; для CPU-тяжёлых форматов — в пуле процессов.
+
+        Файлы независимы до слияния, поэтому парсинг распараллеливается
+        по ядрам, а само слияние остаётся последовательным.
+        """
+        workers = min(os.cpu_count() or 1, len(items))
+        if (
+            not self._parallel_parse
+            or workers < 2
+            or len(items) < _PARSE_POOL_MIN_FILES
+            or sum(len(raw) for _, raw in items) < _PARSE_POOL_MIN_BYTES
+        ):
+            return [(file, parse(file, raw)) for file, raw in items]
+
+        files = [file for file, _ in items]
+        raws = [raw for _, raw in items]
+        # по одному куску на воркер: `parse` сериализуется один раз на кусок,
+        # и состояние мергера (например, VM QuickJS) переиспользуется внутри него
+        chunksize = -(-len(items) // workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(zip(files, pool.map(parse, files, raws, chunksize=chunksize)))
+
+    # ---------- кэш разобранных файлов ------------------------------------- #
+    def _cache_key(self, file: Path) -> Tuple[Any, ...]:
+        st = file.stat()
+        return (_CACHE_VERSION, type(self).__name__, str(file), st.st_mtime_ns, st.st_size)
+
+    def _cache_path(self, file: Path) -> Path:
+        assert self._cache_dir is not None
+        digest = hashlib.sha1(f"{type(self).__name__}:{file}".encode()).hexdigest()
+        return self._cache_dir / f"{digest}.pickle"
+
+    def _cache_load(self, file: Path, key: Tuple[Any, ...]) -> Tuple[bool, Any]:
+        # запись — два pickle подряд: сначала ключ, затем payload; устаревшую
+        # запись отбрасываем, не десериализуя payload
+        try:
+            with self._cache_path(file).open("rb") as fh:
+                if pickle.load(fh) != key:
+                    return False, None
+                return True, pickle.load(fh)
+        except Exception:
+            return False, None                     # нет записи, она битая или чужого формата
+
+    def _cache_store(self, file: Path, key: Tuple[Any, ...], payload: Any) -> None:
+        if self._cache_dir is None:
+            return
+        tmp: str | None = None
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            # пишем во временный файл и атомарно подменяем запись, чтобы
+            # параллельные запуски никогда не видели её недописанной
+            fd, tmp = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump(key, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(payload, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._cache_path(file))
+        except OSError:                            # кэш — необязательная оптимизация
+            if tmp is not None:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp)
+
+    @staticmethod
+    def _validate_tree(node: Any, filename: Path) -> None:
+        """Проверяем дерево переводов (см. `_merge_core.validate_tree`)."""
+        validate_tree(node, filename)
 
 
 # --------------------------------------------------------------------------- #
 class YamlMerger(BaseMerger):
+    _parallel_parse = True
+
+    @staticmethod
+    def _load_yaml(file: Path, raw: bytes) -> Any:
+        return yaml.load(raw, Loader=_YamlLoader) or {}
+
     def merge(self) -> Dict[str, Any]:
         merged: Dict[str, Any] = {}
-        for file in self.input_dir.glob("*.y*ml"):
-            lang = file.stem
-            payload: Any = yaml.safe_load(file.read_text(encoding="utf-8")) or {}
-            self._validate_tree(payload, file)
+        for file, payload in self._parse_files("*.y*ml", self._load_yaml):
+            lang = sys.intern(file.stem)
             _merge_nested(merged, payload, lang, file)
         return merged
 
 
 class JsonMerger(BaseMerger):
+    @staticmethod
+    def _load_json(file: Path, raw: bytes) -> Any:
+        return orjson.loads(raw)
+
     def merge(self) -> Dict[str, Any]:
         merged: Dict[str, Any] = {}
-        for file in self.input_dir.glob("*.json"):
-            lang = file.stem
-            payload: Any = json.loads(file.read_text(encoding="utf-8"))
-            self._validate_tree(payload, file)
+        for file, payload in self._parse_files("*.json", self._load_json):
+            lang = sys.intern(file.stem)
             _merge_nested(merged, payload, lang, file)
         return merged
 
@@ -161,51 +230,67 @@ class JsonMerger(BaseMerger):
 class JsMerger(BaseMerger):
     """
     Парсит файлы формата  export default { ... };
-    Понимает template-literals через json5 или (fallback) QuickJS.
+    Обычные литералы разбирает json / json5, template-literals и прочий
+    JS — QuickJS.
     """
 
     _re_export   = re.compile(r"^\s*export\s+default\s+", re.I | re.S)
-    _re_backtick = re.compile(r"`([^`\\]*(?:\\.[^`\\]*)*)`", re.S)
 
-    @staticmethod
-    def _strip_template_literals(src: str) -> str:
-        """`строка` → "строка", если нет ${…}."""
-        def repl(m: re.Match) -> str:
-            body = m.group(1)
-            if "${" in body:
-                return m.group(0)                  # оставляем как есть
-            return json.dumps(body, ensure_ascii=False)
-        return JsMerger._re_backtick.sub(repl, src)
+    _parallel_parse = True
 
-    # ----------------------------------------------------------------- #
-    def _load_js_object(self, file: Path) -> Mapping[str, Any]:
-        src = file.read_text(encoding="utf-8")
-        src = self._re_export.sub("(", src, count=1).rstrip()
-        if src.endswith(";"):
-            src = src[:-1].rstrip()
-        src += ")"                                 # делаем выражение
-
-        # 1) дешёвый вариант — json5
-        try:
-            return json5.loads(self._strip_template_literals(src))
-        except ValueError:
-            pass
+    def __init__(self, input_dir: Path, use_cache: bool = True) -> None:
+        super().__init__(input_dir, use_cache)
+        # VM QuickJS создаётся лениво и переиспользуется для всех файлов
+        self._qjs_ctx: quickjs.Context | None = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # VM QuickJS не сериализуется: в процессе-воркере создаётся своя
+        state = self.__dict__.copy()
+        state["_qjs_ctx"] = None
+        return state
 
-        # 2) полный парсинг QuickJS
-        ctx = quickjs.Context()
+    # ----------------------------------------------------------------- #
+    def _load_js_object(self, file: Path, raw: bytes) -> Mapping[str, Any]:
+        src = raw.decode("utf-8")
+        # хвостовые пробелы и `;` срезаем с конца строки, не сканируя весь исходник
+        src = self._re_export.sub("", src, count=1).rstrip().removesuffix(";").rstrip()
+
+        # template-literals (экранирование, ${…}, бэктики внутри строк) и
+        # `__proto__` (в литерале задаёт прототип, а не собственный ключ)
+        # по семантике JS понимает только QuickJS — быстрые пути лишь без них
+        if "`" not in src and "__proto__" not in src:
+            # 1) самый дешёвый вариант — строгий JSON (stdlib, на C)
+            try:
+                return json.loads(src)
+            except ValueError:
+                pass
+
+            # 2) JS-синтаксис без вычислений — json5
+            try:
+                return json5.loads(src)
+            except ValueError:
+                pass
+
+        src = f"({src})"                           # делаем выражение
+
+        # 3) полный парсинг QuickJS; у биндинга нет доступа к свойствам
+        #    объекта из Python, поэтому дерево забираем через JSON-текст
+        if self._qjs_ctx is None:
+            self._qjs_ctx = quickjs.Context()
+            # контекст общий для всех файлов: замораживаем то, на что опирается
+            # JSON.stringify, чтобы один файл не мог изменить результат другого
+            self._qjs_ctx.eval(_QJS_FREEZE_INTRINSICS)
         try:
-            json_str = ctx.eval(f"JSON.stringify({src})")
-            return json.loads(json_str)
+            json_str = self._qjs_ctx.eval(f"JSON.stringify({src})")
+            return orjson.loads(json_str)
         except quickjs.JSException as exc:
             raise InvalidTranslationFile(f"{file}: {exc}") from exc
 
     # ----------------------------------------------------------------- #
     def merge(self) -> Dict[str, Any]:
         merged: Dict[str, Any] = {}
-        for file in self.input_dir.glob("*.js"):
-            lang = file.stem
-            payload = self._load_js_object(file)
-            self._validate_tree(payload, file)
+        for file, payload in self._parse_files("*.js", self._load_js_object):
+            lang = sys.intern(file.stem)
             _merge_nested(merged, payload, lang, file)
         return merged
 
@@ -219,6 +304,7 @@ def _get_parser() -> argparse.ArgumentParser:
         sp = sub.add_parser(name, help=help_)
         sp.add_argument("--input-dir", type=Path, required=True, help="Directory with language files")
         sp.add_argument("--output", type=Path, default=Path("translations.json"), help="Output file")
+        sp.add_argument("--no-cache", action="store_true", help="Re-parse every file, ignoring the parse cache")
 
     _add("merge-yaml", "Merge *.yaml / *.yml files")
     _add("merge-json", "Merge flat JSON files")
@@ -227,7 +313,12 @@ def _get_parser() -> argparse.ArgumentParser:
 
 
 def _write_output(tree: Dict[str, Any], dst: Path) -> None:
-    dst.write_text(json.dumps(tree, ensure_ascii=False, indent=2), encoding="utf-8")
+    # OPT_NON_STR_KEYS — YAML может дать не-строковые ключи (например, `1: ...`)
+    try:
+        dst.write_bytes(orjson.dumps(tree, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    except orjson.JSONEncodeError:
+        # orjson не сериализует вложенность глубже 254 уровней — stdlib справляется
+        dst.write_text(json.dumps(tree, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"✅ wrote {dst} ({len(tree)} top-level keys)")
 
 
@@ -237,11 +328,11 @@ def main(argv: list[str] | None = None) -> None:
     merger: BaseMerger
     match args.command:
         case "merge-yaml":
-            merger = YamlMerger(args.input_dir)
+            merger = YamlMerger(args.input_dir, use_cache=not args.no_cache)
         case "merge-json":
-            merger = JsonMerger(args.input_dir)
+            merger = JsonMerger(args.input_dir, use_cache=not args.no_cache)
         case "merge-js":
-            merger = JsMerger(args.input_dir)
+            merger = JsMerger(args.input_dir, use_cache=not args.no_cache)
         case _:
             sys.exit(f"Unknown command {args.command!r}")
 